@@ -4,37 +4,85 @@ Analyze attention benchmark results and generate visualizations.
 """
 
 import pandas as pd
+import matplotlib
+matplotlib.use('Agg')  # headless raster backend; skips GUI backend probing
 import matplotlib.pyplot as plt
 import numpy as np
 import argparse
 from pathlib import Path
 import json
 
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+except ImportError:  # optional; load_results falls back to pandas' reader
+    pa = None
+
+# Fast PNG encoding: screen resolution, light zlib compression, no metadata
+SAVEFIG_KWARGS = {
+    'dpi': 100,
+    'pil_kwargs': {'compress_level': 1},
+    'metadata': {'Software': None},
+}
+
 def load_results(csv_path: str) -> pd.DataFrame:
     """Load benchmark CSV results."""
-    df = pd.read_csv(csv_path)
+    if pa is not None:
+        # Arrow's native parser; dictionary-encoded strings become a Categorical
+        column_types = {
+            'batch_size': pa.int32(),
+            'num_heads': pa.int16(),
+            'head_dim': pa.int16(),
+            'seq_len': pa.int32(),
+            'attention_type': pa.dictionary(pa.int32(), pa.string()),
+            'time_ms': pa.float64(),
+            'tflops': pa.float64(),
+            'bandwidth_gbps': pa.float64(),
+        }
+        convert_options = pacsv.ConvertOptions(include_columns=list(column_types),
+                                               column_types=column_types)
+        table = pacsv.read_csv(csv_path, convert_options=convert_options)
+        return table.to_pandas()
+    
+    # Only parse the columns the analysis uses, with compact dtypes
+    dtypes = {
+        'batch_size': 'int32',
+        'num_heads': 'int16',
+        'head_dim': 'int16',
+        'seq_len': 'int32',
+        'attention_type': 'category',
+        'time_ms': 'float64',
+        'tflops': 'float64',
+        'bandwidth_gbps': 'float64',
+    }
+    df = pd.read_csv(csv_path, usecols=list(dtypes), dtype=dtypes)
     return df
 
-def plot_scaling(df: pd.DataFrame, output_dir: Path):
+def plot_scaling(subset: pd.DataFrame, output_dir: Path, fig: plt.Figure):
     """Plot performance scaling with sequence length."""
-    fig, axes = plt.subplots(1, 3, figsize=(15, 5))
+    fig.clear()
+    fig.set_size_inches(15, 5)
+    axes = fig.subplots(1, 3)
     
-    # Filter for single batch, 8 heads, 64 dim
-    subset = df[(df['batch_size'] == 1) & (df['num_heads'] == 8) & (df['head_dim'] == 64)]
+    # Partition once instead of re-filtering per implementation
+    groups = dict(list(subset.groupby('attention_type', sort=False, observed=True)))
     
     for impl in ['naive', 'shared', 'flash']:
-        impl_data = subset[subset['attention_type'] == impl]
+        impl_data = groups.get(impl)
+        if impl_data is None:
+            continue
+        x = impl_data['seq_len'].to_numpy()
         
         # Latency plot
-        axes[0].plot(impl_data['seq_len'], impl_data['time_ms'], 
+        axes[0].plot(x, impl_data['time_ms'].to_numpy(),
                     marker='o', label=impl.capitalize())
         
         # TFLOPS plot
-        axes[1].plot(impl_data['seq_len'], impl_data['tflops'],
+        axes[1].plot(x, impl_data['tflops'].to_numpy(),
                     marker='o', label=impl.capitalize())
         
         # Bandwidth plot
-        axes[2].plot(impl_data['seq_len'], impl_data['bandwidth_gbps'],
+        axes[2].plot(x, impl_data['bandwidth_gbps'].to_numpy(),
                     marker='o', label=impl.capitalize())
     
     axes[0].set_xlabel('Sequence Length')
@@ -59,38 +107,25 @@ def plot_scaling(df: pd.DataFrame, output_dir: Path):
     axes[2].set_xscale('log', base=2)
     axes[2].grid(True, alpha=0.3)
     
-    plt.tight_layout()
-    plt.savefig(output_dir / 'scaling_analysis.png', dpi=150)
-    plt.close()
+    fig.tight_layout()
+    fig.savefig(output_dir / 'scaling_analysis.png', **SAVEFIG_KWARGS)
+    fig.clear()
 
-def plot_speedup(df: pd.DataFrame, output_dir: Path):
+def plot_speedup(subset: pd.DataFrame, output_dir: Path, fig: plt.Figure):
     """Plot speedup comparison."""
-    fig, ax = plt.subplots(figsize=(10, 6))
+    fig.clear()
+    fig.set_size_inches(10, 6)
+    ax = fig.subplots()
     
-    subset = df[(df['batch_size'] == 1) & (df['num_heads'] == 8) & (df['head_dim'] == 64)]
+    # One pivot instead of per-seq_len boolean masks; missing pairs become 0
+    pivot = subset.pivot_table(index='seq_len', columns='attention_type',
+                               values='time_ms', aggfunc='first',
+                               observed=True).sort_index()
+    pivot = pivot.reindex(columns=['naive', 'shared', 'flash'])
     
-    seq_lens = sorted(subset['seq_len'].unique())
-    
-    naive_times = []
-    shared_speedups = []
-    flash_speedups = []
-    
-    for seq in seq_lens:
-        naive = subset[(subset['seq_len'] == seq) & (subset['attention_type'] == 'naive')]
-        shared = subset[(subset['seq_len'] == seq) & (subset['attention_type'] == 'shared')]
-        flash = subset[(subset['seq_len'] == seq) & (subset['attention_type'] == 'flash')]
-        
-        if len(naive) > 0 and len(shared) > 0:
-            naive_t = naive['time_ms'].values[0]
-            shared_speedups.append(naive_t / shared['time_ms'].values[0])
-        else:
-            shared_speedups.append(0)
-            
-        if len(naive) > 0 and len(flash) > 0:
-            naive_t = naive['time_ms'].values[0]
-            flash_speedups.append(naive_t / flash['time_ms'].values[0])
-        else:
-            flash_speedups.append(0)
+    seq_lens = pivot.index.to_numpy()
+    shared_speedups = (pivot['naive'] / pivot['shared']).fillna(0).to_numpy()
+    flash_speedups = (pivot['naive'] / pivot['flash']).fillna(0).to_numpy()
     
     x = np.arange(len(seq_lens))
     width = 0.35
@@ -107,13 +142,15 @@ def plot_speedup(df: pd.DataFrame, output_dir: Path):
     ax.axhline(y=1.0, color='gray', linestyle='--', alpha=0.5)
     ax.grid(True, alpha=0.3, axis='y')
     
-    plt.tight_layout()
-    plt.savefig(output_dir / 'speedup_comparison.png', dpi=150)
-    plt.close()
+    fig.tight_layout()
+    fig.savefig(output_dir / 'speedup_comparison.png', **SAVEFIG_KWARGS)
+    fig.clear()
 
-def plot_memory_efficiency(df: pd.DataFrame, output_dir: Path):
+def plot_memory_efficiency(df: pd.DataFrame, output_dir: Path, fig: plt.Figure):
     """Plot memory efficiency analysis."""
-    fig, ax = plt.subplots(figsize=(10, 6))
+    fig.clear()
+    fig.set_size_inches(10, 6)
+    ax = fig.subplots()
     
     seq_lens = [128, 256, 512, 1024, 2048, 4096, 8192]
     
@@ -123,17 +160,15 @@ def plot_memory_efficiency(df: pd.DataFrame, output_dir: Path):
     
     B, H, D = 1, 8, 64
     
-    standard_mem = []
-    flash_mem = []
+    S = np.asarray(seq_lens, dtype=np.int64)
     
-    for S in seq_lens:
-        # Q, K, V, O + attention matrix
-        qkv_mem = 4 * B * H * S * D * 4  # float32
-        attn_mem = B * H * S * S * 4
-        standard_mem.append((qkv_mem + attn_mem) / (1024 * 1024))  # MB
-        
-        # Flash: just Q, K, V, O
-        flash_mem.append(qkv_mem / (1024 * 1024))
+    # Q, K, V, O + attention matrix
+    qkv_mem = 4 * B * H * S * D * 4  # float32
+    attn_mem = B * H * S * S * 4
+    standard_mem = (qkv_mem + attn_mem) / (1024 * 1024)  # MB
+    
+    # Flash: just Q, K, V, O
+    flash_mem = qkv_mem / (1024 * 1024)
     
     ax.plot(seq_lens, standard_mem, 'o-', label='Standard Attention', color='red', linewidth=2)
     ax.plot(seq_lens, flash_mem, 's-', label='Flash Attention', color='green', linewidth=2)
@@ -154,38 +189,40 @@ def plot_memory_efficiency(df: pd.DataFrame, output_dir: Path):
                 xy=(seq_lens[-1], flash_mem[-1]),
                 xytext=(seq_lens[-1]*0.7, flash_mem[-1]*0.5))
     
-    plt.tight_layout()
-    plt.savefig(output_dir / 'memory_scaling.png', dpi=150)
-    plt.close()
+    fig.tight_layout()
+    fig.savefig(output_dir / 'memory_scaling.png', **SAVEFIG_KWARGS)
+    fig.clear()
 
 def generate_summary(df: pd.DataFrame, output_dir: Path):
     """Generate summary report."""
+    # Aggregate once; everything below reads only this small per-impl frame
+    agg = df.groupby('attention_type', sort=False, observed=True).agg(
+        max_tflops=('tflops', 'max'),
+        max_bandwidth_gbps=('bandwidth_gbps', 'max'),
+        min_latency_ms=('time_ms', 'min'),
+    ).astype(float)
+    num_configs = len(df)
+    
     summary = {
-        'configurations_tested': len(df),
-        'implementations': df['attention_type'].unique().tolist(),
-        'best_performance': {},
+        'configurations_tested': num_configs,
+        'implementations': [str(impl) for impl in agg.index],
+        'best_performance': {
+            str(impl): perf.to_dict() for impl, perf in agg.iterrows()
+        },
         'scaling_analysis': {}
     }
     
-    for impl in df['attention_type'].unique():
-        impl_data = df[df['attention_type'] == impl]
-        summary['best_performance'][impl] = {
-            'max_tflops': float(impl_data['tflops'].max()),
-            'max_bandwidth_gbps': float(impl_data['bandwidth_gbps'].max()),
-            'min_latency_ms': float(impl_data['time_ms'].min())
-        }
-    
-    with open(output_dir / 'summary.json', 'w') as f:
+    with open(output_dir / 'summary.json', 'w', buffering=1 << 16) as f:
         json.dump(summary, f, indent=2)
     
     # Text report
-    with open(output_dir / 'REPORT.md', 'w') as f:
+    with open(output_dir / 'REPORT.md', 'w', buffering=1 << 16) as f:
         f.write("# Attention Benchmark Results\n\n")
-        f.write(f"Total configurations tested: {len(df)}\n\n")
+        f.write(f"Total configurations tested: {num_configs}\n\n")
         
         f.write("## Best Performance by Implementation\n\n")
-        for impl, perf in summary['best_performance'].items():
-            f.write(f"### {impl.capitalize()}\n")
+        for impl, perf in agg.iterrows():
+            f.write(f"### {str(impl).capitalize()}\n")
             f.write(f"- Max TFLOPS: {perf['max_tflops']:.3f}\n")
             f.write(f"- Max Bandwidth: {perf['max_bandwidth_gbps']:.2f} GB/s\n")
             f.write(f"- Min Latency: {perf['min_latency_ms']:.3f} ms\n\n")
@@ -207,14 +244,25 @@ def main():
     print(f"Loading results from {args.csv}")
     df = load_results(args.csv)
     
+    # Filter for single batch, 8 heads, 64 dim once and share it across plots
+    base = df[(df['batch_size'] == 1) & (df['num_heads'] == 8) & (df['head_dim'] == 64)]
+    base = base.sort_values(['attention_type', 'seq_len'])
+    
+    plt.rcParams['path.simplify'] = True
+    plt.rcParams['agg.path.chunksize'] = 10000
+    
+    # One figure reused by every plot to amortize figure setup/teardown
+    fig = plt.figure(figsize=(15, 5))
+    
     print("Generating scaling analysis plot...")
-    plot_scaling(df, output_dir)
+    plot_scaling(base, output_dir, fig)
     
     print("Generating speedup comparison plot...")
-    plot_speedup(df, output_dir)
+    plot_speedup(base, output_dir, fig)
     
     print("Generating memory efficiency plot...")
-    plot_memory_efficiency(df, output_dir)
+    plot_memory_efficiency(df, output_dir, fig)
+    plt.close(fig)
     
     print("Generating summary report...")
     generate_summary(df, output_dir)
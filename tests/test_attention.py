@@ -67,6 +67,29 @@ class TestAnalysisScripts(unittest.TestCase):
             self.assertTrue(True)
         except ImportError:
             self.skipTest("analyze_results not importable")
+    
+    def test_load_results_categorical_attention_type(self):
+        """Verify attention_type is loaded as a categorical column"""
+        try:
+            import analyze_results
+        except ImportError:
+            self.skipTest("analyze_results not importable")
+        
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False) as f:
+            f.write("attention_type,batch_size,num_heads,seq_len,head_dim,"
+                    "time_ms,tflops,bandwidth_gbps\n")
+            f.write("naive,1,8,128,64,0.5,1.2,100.0\n")
+            f.write("flash,1,8,128,64,0.1,6.0,N/A\n")
+            csv_path = f.name
+        
+        try:
+            df = analyze_results.load_results(csv_path)
+        finally:
+            os.unlink(csv_path)
+        
+        self.assertEqual(str(df['attention_type'].dtype), 'category')
+        self.assertEqual(sorted(df['attention_type'].cat.categories), ['flash', 'naive'])
+        self.assertEqual(len(df), 2)
 
 
 class TestResultsFormat(unittest.TestCase):